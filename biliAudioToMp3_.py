@@ -1,147 +1,309 @@
+import asyncio
+import collections
+import itertools
 import json
 import os
 import platform
+import re
+import shutil
 import subprocess
 import sys
 import threading
 import time
 import tkinter as tk
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
 from tkinter import filedialog, messagebox, ttk
 
-import psutil
+try:
+    import orjson  # 比标准库json解析更快
+except ImportError:
+    orjson = None
+
+# 未安装orjson时退回标准库json（两者都可直接解析bytes）
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# 文件名非法字符（预编译正则，对中文标题比str.translate更快）
+_INVALID_RE = re.compile(r'[\\/:*?"<>|]')
+
+# 启动时解析一次ffmpeg路径，避免每次启动进程都重新搜索PATH
+FFMPEG_PATH = shutil.which('ffmpeg') or 'ffmpeg'
+
+# POSIX上预先把参数编码为bytes，固定参数只编码一次；Windows的CreateProcess只接受str
+_native_arg = os.fsencode if os.name == 'posix' else os.fsdecode
+_FFMPEG_BASE = tuple(map(_native_arg, (
+    FFMPEG_PATH,
+    '-hide_banner',  # 隐藏不必要的输出
+    '-loglevel', 'error',  # 只显示错误信息
+)))
+_FFMPEG_ENC = tuple(map(_native_arg, ('-c:a', 'libmp3lame', '-q:a', '0', '-y')))
+_ARG_INPUT = _native_arg('-i')
+_ARG_MAP = _native_arg('-map')
+# 单文件转换与批量转换一样显式选取第一个音频流
+_MAP_FIRST_AUDIO = _native_arg('0:a:0')
+_ARG_THREADS = _native_arg('-threads')
+
+
+async def run_ffmpeg(args):
+    """异步运行一次ffmpeg，所有转换任务统一从这里启动进程，返回(退出码, 错误输出)
+
+    args中的每一项都应已经过_native_arg转换
+    """
+    process = await asyncio.create_subprocess_exec(
+        *_FFMPEG_BASE,
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,  # ffmpeg不向stdout输出，无需管道
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    # 只在失败时才解码错误输出
+    if process.returncode != 0:
+        return process.returncode, stderr.decode('utf-8', 'replace')
+    return process.returncode, ''
+
+
+def usable_cpu_count():
+    """当前进程实际可用的逻辑CPU核数（遵循CPU亲和性设置，如容器或taskset限制）"""
+    if hasattr(os, 'process_cpu_count'):  # Python 3.13+
+        return os.process_cpu_count() or 1
+    if hasattr(os, 'sched_getaffinity'):  # Linux
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _scan_entry_json(path):
+    """基于os.scandir递归查找entry.json，找到后不再深入该目录"""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        if entry.name == 'entry.json' and entry.is_file():
+            yield entry.path
+            return
+        # 跳过隐藏目录，不跟随符号链接（与os.walk默认行为一致）
+        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+            subdirs.append(entry.path)
+
+    for subdir in subdirs:
+        yield from _scan_entry_json(subdir)
 
 
 def find_entry_json_files(root_dir):
     """递归查找所有entry.json文件（优化版）"""
-    json_files = []
-    for root, dirs, files in os.walk(root_dir):
-        if 'entry.json' in files:
-            json_files.append(os.path.join(root, 'entry.json'))
-        # 限制目录深度，避免搜索过深
-        dirs[:] = [d for d in dirs if not d.startswith('.')]  # 跳过隐藏目录
-    return json_files
+    return list(_scan_entry_json(root_dir))
 
 
-@lru_cache(maxsize=None)
-def find_audio_file_cached(json_dir):
-    """缓存音频文件查找结果"""
-    return find_audio_file(json_dir)
+def iter_entry_json_files_parallel(input_dirs, max_workers=None):
+    """按顶层子目录拆分，用线程池并行查找entry.json，按完成顺序逐个产出"""
+    if max_workers is None:
+        max_workers = min(32, usable_cpu_count() * 4)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for input_dir in input_dirs:
+            # 输入目录本身就是一个视频目录
+            top_json = os.path.join(input_dir, 'entry.json')
+            if os.path.isfile(top_json):
+                yield top_json
+                continue
+
+            try:
+                with os.scandir(input_dir) as it:
+                    children = [entry.path for entry in it
+                                if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.')]
+            except OSError as e:
+                print(f"Error scanning {input_dir}: {e}")
+                continue
+
+            futures.extend(executor.submit(find_entry_json_files, child) for child in children)
+
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+# 支持的音频文件扩展名（按优先级排序，更常见的音频格式优先）
+AUDIO_EXT_TUPLE = ('.m4a', '.mp4', '.aac', '.flv', '.m4s')
+# 常见音频目录，子目录搜索时优先进入
+COMMON_AUDIO_DIRS = {'audio', 'sound', 'voice', 'music'}
+# 子目录搜索的最大深度
+AUDIO_SEARCH_DEPTH = 2
 
 
 def find_audio_file(json_dir):
     """在entry.json所在目录及其子目录中查找音频文件（优化版）"""
-    # 支持的音频文件扩展名（按优先级排序）
-    audio_extensions = ['.m4a', '.mp4', '.aac', '.flv', '.m4s']  # 更常见的音频格式优先
-
     # 先在entry.json同目录查找
-    for ext in audio_extensions:
+    for ext in AUDIO_EXT_TUPLE:
         audio_path = os.path.join(json_dir, f'audio{ext}')
-        if os.path.exists(audio_path):
+        if os.path.isfile(audio_path):
             return audio_path
 
-    # 优化子目录搜索 - 只搜索常见音频目录
-    common_audio_dirs = {'audio', 'sound', 'voice', 'music'}
-    for root, dirs, files in os.walk(json_dir):
-        # 限制搜索深度
-        if root.count(os.sep) - json_dir.count(os.sep) > 2:
-            del dirs[:]
-            continue
-
-        # 优先搜索常见音频目录
-        dirs[:] = [d for d in dirs if d.lower() in common_audio_dirs or not d.startswith('.')]
-
-        for file in files:
-            file_lower = file.lower()
-            if any(file_lower.endswith(ext) for ext in audio_extensions):
-                # 优先匹配以"audio"开头的文件
-                if file_lower.startswith('audio'):
-                    return os.path.join(root, file)
-                # 返回第一个找到的音频文件（如果不需要严格匹配audio开头）
-                return os.path.join(root, file)
+    # 逐层扫描子目录，深度固定，命中即返回
+    current_dirs = [json_dir]
+    for depth in range(AUDIO_SEARCH_DEPTH + 1):
+        next_dirs = []
+        for directory in current_dirs:
+            found = None
+            subdirs = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        name = entry.name.lower()
+                        if entry.is_dir(follow_symlinks=False):
+                            if not name.startswith('.'):
+                                subdirs.append(entry)
+                        elif name.endswith(AUDIO_EXT_TUPLE) and entry.is_file():
+                            # 优先匹配以"audio"开头的文件
+                            if name.startswith('audio'):
+                                return entry.path
+                            if found is None:
+                                found = entry.path
+            except OSError:
+                continue
+
+            if found:
+                return found
+
+            if depth < AUDIO_SEARCH_DEPTH:
+                # 优先搜索常见音频目录
+                subdirs.sort(key=lambda e: e.name.lower() not in COMMON_AUDIO_DIRS)
+                next_dirs.extend(e.path for e in subdirs)
+        current_dirs = next_dirs
 
     return None
 
 
-@lru_cache(maxsize=None)
-def extract_title_name_cached(json_path):
-    """缓存提取的title名称"""
-    return extract_title_name(json_path)
-
-
 def extract_title_name(json_path):
     """从entry.json中提取part字段（优化版）"""
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(json_path, 'rb') as f:
+            data = _json_loads(f.read())
             part_name = data.get('title', 'untitled')
-            # 清理文件名中的非法字符（优化清理逻辑）
-            invalid_chars = {'\\', '/', ':', '*', '?', '"', '<', '>', '|'}
-            part_name = ''.join(c for c in part_name if c not in invalid_chars)
-            # 限制文件名长度
-            if len(part_name) > 150:
-                part_name = part_name[:150]
-            return part_name
+            # 清理文件名中的非法字符并限制文件名长度
+            return _INVALID_RE.sub('', part_name)[:150]
     except Exception as e:
         print(f"Error reading {json_path}: {e}")
         return None
 
 
-def process_single_file(json_path, output_dir, progress_callback=None):
-    """处理单个entry.json对应的音频文件（带进度回调）"""
+def _already_converted(mp3_path):
+    """只用一次stat判断输出文件是否已存在且非空"""
     try:
-        # 使用缓存方法
-        part_name = extract_title_name_cached(json_path)
-        if not part_name:
-            if progress_callback:
-                progress_callback(False)
-            return False
-
-        # 使用缓存方法查找音频文件
-        json_dir = os.path.dirname(json_path)
-        audio_path = find_audio_file_cached(json_dir)
-        if not audio_path:
-            print(f"Audio file not found in {json_dir} or its subdirectories")
-            if progress_callback:
-                progress_callback(False)
-            return False
+        return os.stat(mp3_path).st_size > 0
+    except FileNotFoundError:
+        return False
 
-        # 创建输出目录
-        os.makedirs(output_dir, exist_ok=True)
 
-        # 最终MP3文件路径
-        final_mp3 = os.path.join(output_dir, f'{part_name}.mp3')
+def _encode_args(final_mp3, ffmpeg_threads):
+    """单个MP3输出的编码参数"""
+    # 由调用方决定ffmpeg内部线程数，避免与并发任务叠加导致CPU超额订阅
+    threads_args = (_ARG_THREADS, _native_arg(str(ffmpeg_threads))) if ffmpeg_threads is not None else ()
+    return [*threads_args, *_FFMPEG_ENC, _native_arg(final_mp3)]
 
-        # 检查文件是否已存在且不需要重新转换
-        if os.path.exists(final_mp3) and os.path.getsize(final_mp3) > 0:
-            print(f"Skipping existing file: {final_mp3}")
-            if progress_callback:
-                progress_callback(True)
-            return True
-
-        # 直接从音频文件转换为MP3（优化FFmpeg参数）
-        result = subprocess.run([
-            'ffmpeg',
-            '-hide_banner',  # 隐藏不必要的输出
-            '-loglevel', 'error',  # 只显示错误信息
-            '-i', audio_path,
-            '-c:a', 'libmp3lame',
-            '-q:a', '0',
-            '-y',
-            final_mp3
-        ], capture_output=True, text=True)
-
-        if result.returncode == 0:
+
+def prepare_single_file(json_path, output_dir):
+    """解析entry.json并定位音频文件（不启动ffmpeg）
+
+    返回需要转换的(音频路径, MP3路径)；输出已存在时返回True，无法处理时返回False
+    """
+    # 每个entry.json在一次运行中只处理一次，直接解析即可，无需缓存
+    part_name = extract_title_name(json_path)
+    if not part_name:
+        return False
+
+    # 查找音频文件
+    json_dir = os.path.dirname(json_path)
+    audio_path = find_audio_file(json_dir)
+    if not audio_path:
+        print(f"Audio file not found in {json_dir} or its subdirectories")
+        return False
+
+    # 最终MP3文件路径
+    final_mp3 = os.path.join(output_dir, f'{part_name}.mp3')
+
+    # 检查文件是否已存在且不需要重新转换
+    if _already_converted(final_mp3):
+        print(f"Skipping existing file: {final_mp3}")
+        return True
+
+    return audio_path, final_mp3
+
+
+async def _convert_single(json_path, audio_path, final_mp3, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用把单个音频文件转换为MP3"""
+    # 直接从音频文件转换为MP3（优化FFmpeg参数）
+    args = [
+        _ARG_INPUT, _native_arg(audio_path),
+        _ARG_MAP, _MAP_FIRST_AUDIO,
+        *_encode_args(final_mp3, ffmpeg_threads),
+    ]
+    try:
+        returncode, stderr = await run_ffmpeg(args)
+    except Exception as e:
+        # 进程无法启动（如OSError）时同样只报告一次结果
+        print(f"Error processing {json_path}: {str(e)}")
+        if progress_callback:
+            progress_callback(False)
+        return False
+
+    if returncode == 0:
+        print(f"Successfully converted: {audio_path} -> {final_mp3}")
+        if progress_callback:
+            progress_callback(True)
+        return True
+    else:
+        print(f"FFmpeg error processing {json_path}:\n{stderr}")
+        if progress_callback:
+            progress_callback(False)
+        return False
+
+
+async def _convert_batch(jobs, results, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用转换多个音频文件，整批失败时逐个重试；每个文件的结果追加到results"""
+    if len(jobs) == 1:
+        results.append(await _convert_single(*jobs[0], progress_callback, ffmpeg_threads))
+        return
+
+    args = []
+    for _, audio_path, _ in jobs:
+        args += [_ARG_INPUT, _native_arg(audio_path)]
+    for index, (_, _, final_mp3) in enumerate(jobs):
+        args += [_ARG_MAP, _native_arg(f'{index}:a:0'), *_encode_args(final_mp3, ffmpeg_threads)]
+
+    try:
+        returncode, stderr = await run_ffmpeg(args)
+    except Exception as e:
+        # 进程无法启动时按整批失败处理，交给下面的逐个重试
+        returncode, stderr = None, str(e)
+
+    if returncode == 0:
+        for json_path, audio_path, final_mp3 in jobs:
             print(f"Successfully converted: {audio_path} -> {final_mp3}")
             if progress_callback:
                 progress_callback(True)
-            return True
-        else:
-            print(f"FFmpeg error processing {json_path}:\n{result.stderr}")
+            results.append(True)
+        return
+
+    print(f"FFmpeg batch of {len(jobs)} files failed, retrying one by one:\n{stderr}")
+    for job in jobs:
+        results.append(await _convert_single(*job, progress_callback, ffmpeg_threads))
+
+
+async def process_single_file(json_path, output_dir, progress_callback=None, ffmpeg_threads=None):
+    """处理单个entry.json对应的音频文件（带进度回调）"""
+    try:
+        # 文件读取和目录扫描都是阻塞I/O，放到线程中执行，避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(None, prepare_single_file, json_path, output_dir)
+        if isinstance(job, bool):
             if progress_callback:
-                progress_callback(False)
-            return False
+                progress_callback(job)
+            return job
+
+        audio_path, final_mp3 = job
+        return await _convert_single(json_path, audio_path, final_mp3, progress_callback, ffmpeg_threads)
 
     except Exception as e:
         print(f"Error processing {json_path}: {str(e)}")
@@ -150,46 +312,166 @@ def process_single_file(json_path, output_dir, progress_callback=None):
         return False
 
 
-def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max_workers=None):
-    """并行处理多个输入文件夹"""
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+async def process_batch(json_paths, output_dir, results, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用转换多个entry.json对应的音频，分摊进程启动和编码器初始化开销
 
-    # 收集所有JSON文件
-    all_json_files = []
-    for input_dir in input_dirs:
-        all_json_files.extend(find_entry_json_files(input_dir))
+    整批失败时逐个重试，以确定每个文件各自的结果。每个文件得出结果时立即追加到results，
+    即使中途发生异常，调用方也能据此知道哪些文件已经报告过结果
+    """
+    if len(json_paths) == 1:
+        results.append(await process_single_file(json_paths[0], output_dir, progress_callback, ffmpeg_threads))
+        return
 
-    total = len(all_json_files)
-    if total == 0:
-        print("没有找到任何entry.json文件")
-        return 0, 0
+    jobs = []
+    deferred = []
+    outputs = set()
+    # 在线程中并行准备本批所有文件，阻塞I/O不占用事件循环线程
+    loop = asyncio.get_running_loop()
+    prepared = await asyncio.gather(
+        *(loop.run_in_executor(None, prepare_single_file, json_path, output_dir) for json_path in json_paths),
+        return_exceptions=True
+    )
+    for json_path, job in zip(json_paths, prepared):
+        if isinstance(job, Exception):
+            print(f"Error processing {json_path}: {str(job)}")
+            job = False
+
+        if isinstance(job, bool):
+            if progress_callback:
+                progress_callback(job)
+            results.append(job)
+        elif job[1] in outputs:
+            # 同一批内输出文件重名，等本批完成后再处理
+            deferred.append(json_path)
+        else:
+            outputs.add(job[1])
+            jobs.append((json_path, *job))
+
+    if jobs:
+        await _convert_batch(jobs, results, progress_callback, ffmpeg_threads)
+
+    for json_path in deferred:
+        results.append(await process_single_file(json_path, output_dir, progress_callback, ffmpeg_threads))
+
+
+# 查找结果队列的容量，查找过快时生产者在此等待
+DISCOVERY_QUEUE_SIZE = 256
+# 单次ffmpeg调用最多合并转换的文件数
+FFMPEG_BATCH_SIZE = 32
+
+
+async def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max_workers=None,
+                                   discovered_callback=None):
+    """并行处理多个输入文件夹（discovered_callback在每找到一个文件时调用，查找结束时以None调用）"""
+    # 输出目录只在开始时创建一次，单个文件处理时不再重复检查
+    os.makedirs(output_dir, exist_ok=True)
 
     # 如果没有指定最大工作线程数，则自动设置
     if max_workers is None:
-        logical_cores = psutil.cpu_count(logical=True)
-        max_workers = logical_cores - 1
+        logical_cores = usable_cpu_count()
+        max_workers = max(1, logical_cores - 1)  # 确保至少1个线程
+
+    # 先取出max_workers个文件，文件较少时据此缩小并发数
+    discovered = iter_entry_json_files_parallel(input_dirs)
+    loop = asyncio.get_running_loop()
+    head = await loop.run_in_executor(None, list, itertools.islice(discovered, max_workers))
+    if discovered_callback:
+        for path in head:
+            discovered_callback(path)
+    if not head:
+        if discovered_callback:
+            discovered_callback(None)
+        print("没有找到任何entry.json文件")
+        return 0, 0
 
-    # 使用线程池并行处理
+    # 音频解码和libmp3lame编码都是单线程的，-threads 0不会带来额外并行，始终让编解码器单线程运行。
+    # -threads只限制编解码器内部的线程：FFmpeg 7起一次多输入调用中每个解码器和编码器各占一个线程，
+    # 因此下面把一批按len(batch)个名额计入max_workers，而不是按一个任务计
+    ffmpeg_threads = 1
+    # 文件少于并发数时不必启动多余的消费者
+    max_workers = min(max_workers, len(head))
+
+    # 生产者/消费者流水线：查找线程把路径放入有界队列，固定数量的转换协程从队列取任务
+    queue = asyncio.Queue(maxsize=DISCOVERY_QUEUE_SIZE)
+    pending = collections.deque(head)
+
+    def produce():
+        try:
+            for path in discovered:
+                if discovered_callback:
+                    discovered_callback(path)
+                asyncio.run_coroutine_threadsafe(queue.put(path), loop).result()
+        finally:
+            if discovered_callback:
+                discovered_callback(None)
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()  # 结束标记
+
+    async def next_path():
+        if pending:
+            return pending.popleft()
+        path = await queue.get()
+        if path is None:
+            queue.put_nowait(None)  # 放回结束标记，让其他消费者也能退出
+        return path
+
+    async def next_batch():
+        """取出一批路径：积压越多每批合并越多，积压不足时逐个处理以保持并行"""
+        first = await next_path()
+        if first is None:
+            return []
+
+        batch = [first]
+        backlog = len(pending) + queue.qsize()
+        # 一批最多占满全部并发名额
+        batch_size = max(1, min(FFMPEG_BATCH_SIZE, max_workers, backlog // max_workers))
+        while len(batch) < batch_size:
+            if pending:
+                batch.append(pending.popleft())
+            elif not queue.empty():
+                path = queue.get_nowait()
+                if path is None:
+                    queue.put_nowait(None)
+                    break
+                batch.append(path)
+            else:
+                break
+        return batch
+
+    # 同时转换的文件数不超过max_workers：每批按文件数占用名额，整批获取以免多个消费者各持一部分而互相等待
+    slots = asyncio.Semaphore(max_workers)
+    slots_lock = asyncio.Lock()
+
+    total = 0
     success = 0
-    processed = 0
-    lock = threading.Lock()  # 用于线程安全的计数
-
-    def task_wrapper(json_path):
-        nonlocal success, processed
-        result = process_single_file(json_path, output_dir, progress_callback)
-        with lock:
-            processed += 1
-            if result:
-                success += 1
-        return result
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(task_wrapper, json_path) for json_path in all_json_files]
-
-        # 等待所有任务完成
-        for future in as_completed(futures):
-            future.result()  # 捕获任何异常
+    async def consumer():
+        nonlocal total, success
+        while batch := await next_batch():
+            async with slots_lock:
+                for _ in batch:
+                    await slots.acquire()
+            results = []
+            try:
+                await process_batch(batch, output_dir, results, progress_callback, ffmpeg_threads)
+            except Exception as e:
+                print(f"处理过程中发生异常: {str(e)}")
+            finally:
+                for _ in batch:
+                    slots.release()
+            # 只把还没有结果的文件记为失败，并为它们补发进度回调，已报告的结果保持不变
+            missing = len(batch) - len(results)
+            if missing > 0:
+                if progress_callback:
+                    for _ in range(missing):
+                        progress_callback(False)
+                results += [False] * missing
+            # 计数只在事件循环线程中修改，普通整数累加即可，无需加锁或原子计数器
+            total += len(results)
+            success += sum(results)
+
+    producer = loop.run_in_executor(None, produce)
+    await asyncio.gather(*(consumer() for _ in range(max_workers)))
+    await producer
 
     return total, success
 
@@ -197,30 +479,30 @@ def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max
 class ProgressWindow:
     """进度显示窗口"""
 
-    def __init__(self, total_tasks):
-        self.root = tk.Tk()
-        self.root.title("处理进度")
-        self.root.geometry("400x200")
-        self.root.resizable(False, False)
-
-        # 防止重复创建Tk实例
-        if not hasattr(ProgressWindow, 'instance_created'):
-            ProgressWindow.instance_created = True
-        else:
-            self.root.destroy()
-            return
-
-        self.total = total_tasks
+    def __init__(self, root):
+        # 复用程序唯一的Tk根窗口，进度窗口作为其子窗口
+        self.root = root
+        self.window = tk.Toplevel(root)
+        self.window.title("处理进度")
+        self.window.geometry("400x200")
+        self.window.resizable(False, False)
+
+        # 总数随查找进度增长：_discovered只由查找一侧修改（同一时刻只有一个线程），Tk线程只读
+        self.total = 0
+        self._discovered = 0
+        self._discovery_done = False
         self.completed = 0
         self.success = 0
+        # 工作线程只往队列追加结果，由Tk线程定时统一刷新界面
+        self._results = collections.deque()
         self.start_time = time.time()
         self.running = True
 
         # 创建框架容器
-        frame = ttk.Frame(self.root, padding="10")
+        frame = ttk.Frame(self.window, padding="10")
         frame.pack(fill=tk.BOTH, expand=True)
 
-        self.label = ttk.Label(frame, text=f"准备处理 {total_tasks} 个文件...", font=("Arial", 10))
+        self.label = ttk.Label(frame, text="正在查找文件...", font=("Arial", 10))
         self.label.pack(pady=5)
 
         self.progress = ttk.Progressbar(frame, orient="horizontal", length=380, mode="determinate")
@@ -260,40 +542,62 @@ class ProgressWindow:
         self.cancel_button = ttk.Button(button_frame, text="取消", command=self.cancel)
         self.cancel_button.pack(side=tk.RIGHT)
 
-        self.root.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
         self.root.after(100, self.update_time)
 
     def update(self, success_flag):
+        """记录一个任务结果（可在任意线程调用，不访问Tk）"""
+        if success_flag is not None:
+            self._results.append(bool(success_flag))
+
+    def add_task(self, path):
+        """记录一个新找到的文件；path为None表示查找结束（不访问Tk）"""
+        if path is None:
+            self._discovery_done = True
+        else:
+            self._discovered += 1
+
+    def update_time(self):
+        """Tk线程定时器：合并期间完成和新找到的任务，每个周期最多重绘一次"""
         if not self.running:
             return
 
-        self.completed += 1
-        if success_flag:
-            self.success += 1
+        finished = 0
+        while self._results:
+            finished += 1
+            if self._results.popleft():
+                self.success += 1
+        self.completed += finished
 
-        progress_value = min(100, int((self.completed / self.total) * 100))
-        self.progress["value"] = progress_value
+        # 先读结束标记再读总数：标记为True时读到的总数一定是最终值
+        discovery_done = self._discovery_done
+        discovered = self._discovered
+        total_changed = discovered != self.total
+        self.total = discovered
 
         elapsed = time.time() - self.start_time
-        speed = self.completed / elapsed if elapsed > 0 else 0
+        self.time_label["text"] = f"已用时间: {elapsed:.1f}秒"
+
+        if (finished or total_changed) and self.total:
+            progress_value = min(100, int((self.completed / self.total) * 100))
+            self.progress["value"] = progress_value
 
-        self.label["text"] = f"处理中: {self.completed}/{self.total} ({progress_value}%)"
-        self.status["text"] = "状态: 处理中..." if self.completed < self.total else "状态: 完成!"
-        self.success_label["text"] = f"成功: {self.success}"
-        self.failed_label["text"] = f"失败: {self.completed - self.success}"
-        self.remaining_label["text"] = f"剩余: {self.total - self.completed}"
-        self.speed_label["text"] = f"速度: {speed:.2f} 文件/秒"
+            speed = self.completed / elapsed if elapsed > 0 else 0
 
-        if self.completed >= self.total:
+            self.label["text"] = f"处理中: {self.completed}/{self.total} ({progress_value}%)"
+            self.status["text"] = "状态: 处理中..." if not discovery_done or self.completed < self.total else "状态: 完成!"
+            self.success_label["text"] = f"成功: {self.success}"
+            self.failed_label["text"] = f"失败: {self.completed - self.success}"
+            self.remaining_label["text"] = f"剩余: {self.total - self.completed}"
+            self.speed_label["text"] = f"速度: {speed:.2f} 文件/秒"
+
+        if discovery_done and self.completed >= self.total:
             self.cancel_button["text"] = "关闭"
             self.status["text"] = "状态: 处理完成!"
             self.running = False
+            return
 
-    def update_time(self):
-        if self.running:
-            elapsed = time.time() - self.start_time
-            self.time_label["text"] = f"已用时间: {elapsed:.1f}秒"
-            self.root.after(1000, self.update_time)
+        self.root.after(100, self.update_time)  # 最多约10次/秒
 
     def cancel(self):
         self.running = False
@@ -301,18 +605,14 @@ class ProgressWindow:
 
     def close(self):
         self.running = False
-        self.root.destroy()
+        self.window.destroy()
 
 
-def select_folders():
+def select_folders(root):
     """使用GUI选择多个文件夹（优化版）"""
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
-
     print("请选择要处理的文件夹...")
     # 允许选择多个文件夹
-    folders = filedialog.askdirectory(title="选择要处理的文件夹", mustexist=True)
+    folders = filedialog.askdirectory(parent=root, title="选择要处理的文件夹", mustexist=True)
 
     if not folders:
         print("没有选择文件夹")
@@ -322,14 +622,10 @@ def select_folders():
     return [folders] if isinstance(folders, str) else list(folders)
 
 
-def select_output_dir():
+def select_output_dir(root):
     """使用GUI选择输出目录"""
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
-
     print("请选择输出目录...")
-    output_dir = filedialog.askdirectory(title="选择输出目录", mustexist=False)
+    output_dir = filedialog.askdirectory(parent=root, title="选择输出目录", mustexist=False)
 
     if not output_dir:
         print("没有选择输出目录")
@@ -341,55 +637,61 @@ def select_output_dir():
 def main():
     print("=== 音频提取转换工具 ===")
 
+    # 整个程序只创建一个Tk根窗口，所有对话框和进度窗口复用它
+    root = tk.Tk()
+    root.withdraw()
+    root.attributes("-topmost", True)
+
     # 检查ffmpeg是否可用
     try:
-        subprocess.run(['ffmpeg', '-version'], check=True,
+        subprocess.run([FFMPEG_PATH, '-version'], check=True,
                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         print("FFmpeg 可用")
     except Exception as e:
         print("错误: 没有找到ffmpeg或无法执行。请确保ffmpeg已安装并添加到系统PATH中。")
-        messagebox.showerror("错误", "没有找到FFmpeg! 请确保FFmpeg已安装并添加到系统PATH中。")
+        messagebox.showerror("错误", "没有找到FFmpeg! 请确保FFmpeg已安装并添加到系统PATH中。", parent=root)
         return
 
     # 选择输入文件夹
-    input_dirs = select_folders()
+    input_dirs = select_folders(root)
     if not input_dirs:
         return
 
     # 选择输出目录
-    output_dir = select_output_dir()
+    output_dir = select_output_dir(root)
     if not output_dir:
         return
 
-    # 显示进度窗口
-    total_files = sum(len(find_entry_json_files(d)) for d in input_dirs)
-    if total_files == 0:
-        messagebox.showinfo("提示", "没有找到任何entry.json文件")
-        return
-
-    progress_window = ProgressWindow(total_files)
+    # 显示进度窗口，文件总数在查找过程中逐步更新
+    progress_window = ProgressWindow(root)
 
     # 启动处理线程
     def processing_thread():
         # 根据系统调整并行度
         max_workers = None
         if platform.system() == "Windows":
-            max_workers = psutil.cpu_count(logical=True) -1  # Windows上限制并发数
+            max_workers = max(1, usable_cpu_count() - 1)  # Windows上限制并发数
 
-        total, success = process_folders_parallel(
+        total, success = asyncio.run(process_folders_parallel(
             input_dirs,
             output_dir,
             progress_window.update,
-            max_workers
-        )
+            max_workers,
+            progress_window.add_task
+        ))
 
         # 处理完成后关闭窗口
         progress_window.close()
 
+        if total == 0:
+            messagebox.showinfo("提示", "没有找到任何entry.json文件", parent=root)
+            root.quit()
+            return
+
         # 显示完成消息
         message = f"处理完成!\n共处理 {total} 个文件, 成功 {success} 个"
         print(message)
-        messagebox.showinfo("完成", message)
+        messagebox.showinfo("完成", message, parent=root)
 
         # 打开输出文件夹
         if os.name == 'nt':  # Windows
@@ -398,12 +700,15 @@ def main():
             opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
             subprocess.run([opener, output_dir], check=False)
 
+        # 结束主事件循环
+        root.quit()
+
     # 启动处理线程
     thread = threading.Thread(target=processing_thread, daemon=True)
     thread.start()
 
     # 启动主事件循环
-    progress_window.root.mainloop()
+    root.mainloop()
 
     # 等待处理线程完成
     thread.join(timeout=1)
@@ -1,5 +1,10 @@
+import asyncio
+import collections
+import itertools
 import os
 import platform
+import re
+import shutil
 import subprocess
 import sys
 import threading
@@ -7,23 +12,107 @@ import time
 import tkinter as tk
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tkinter import filedialog, messagebox, ttk
-import psutil
 
 # 支持的视频文件扩展名
-VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.flv', '.avi', '.mov', '.wmv', '.m4s']
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.flv', '.avi', '.mov', '.wmv', '.m4s')  # 元组可直接传给str.endswith
+# 不参与批量转换的扩展名：DASH分段通常只含一路流（如Bilibili的video.m4s没有音轨），
+# 批内一个没有音频的输入会让整批ffmpeg启动失败，因此逐个转换
+UNBATCHED_EXTENSIONS = ('.m4s',)
+
+# 文件名非法字符（预编译正则，对中文标题比str.translate更快）
+_INVALID_RE = re.compile(r'[\\/:*?"<>|]')
+
+# 启动时解析一次ffmpeg路径，避免每次启动进程都重新搜索PATH
+FFMPEG_PATH = shutil.which('ffmpeg') or 'ffmpeg'
+
+# POSIX上预先把参数编码为bytes，固定参数只编码一次；Windows的CreateProcess只接受str
+_native_arg = os.fsencode if os.name == 'posix' else os.fsdecode
+_FFMPEG_BASE = tuple(map(_native_arg, (
+    FFMPEG_PATH,
+    '-hide_banner',  # 隐藏不必要的输出
+    '-loglevel', 'error',  # 只显示错误信息
+)))
+_FFMPEG_ENC = tuple(map(_native_arg, ('-vn', '-c:a', 'libmp3lame', '-q:a', '0', '-y')))
+_ARG_INPUT = _native_arg('-i')
+_ARG_MAP = _native_arg('-map')
+# 单文件转换与批量转换一样显式选取第一个音频流
+_MAP_FIRST_AUDIO = _native_arg('0:a:0')
+_ARG_THREADS = _native_arg('-threads')
+
+
+async def run_ffmpeg(args):
+    """异步运行一次ffmpeg，所有转换任务统一从这里启动进程，返回(退出码, 错误输出)
+
+    args中的每一项都应已经过_native_arg转换
+    """
+    process = await asyncio.create_subprocess_exec(
+        *_FFMPEG_BASE,
+        *args,
+        stdout=asyncio.subprocess.DEVNULL,  # ffmpeg不向stdout输出，无需管道
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    # 只在失败时才解码错误输出
+    if process.returncode != 0:
+        return process.returncode, stderr.decode('utf-8', 'replace')
+    return process.returncode, ''
+
+
+def usable_cpu_count():
+    """当前进程实际可用的逻辑CPU核数（遵循CPU亲和性设置，如容器或taskset限制）"""
+    if hasattr(os, 'process_cpu_count'):  # Python 3.13+
+        return os.process_cpu_count() or 1
+    if hasattr(os, 'sched_getaffinity'):  # Linux
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _scan_files(path):
+    """基于os.scandir递归遍历文件，跳过隐藏目录"""
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if not entry.name.startswith('.'):
+                yield from _scan_files(entry.path)
+        elif entry.is_file():
+            yield entry
 
 
 def find_video_files(root_dir):
     """递归查找所有视频文件"""
-    video_files = []
-    for root, dirs, files in os.walk(root_dir):
-        for file in files:
-            ext = os.path.splitext(file)[1].lower()
-            if ext in VIDEO_EXTENSIONS:
-                video_files.append(os.path.join(root, file))
-        # 限制目录深度，避免搜索过深
-        dirs[:] = [d for d in dirs if not d.startswith('.')]  # 跳过隐藏目录
-    return video_files
+    return [entry.path for entry in _scan_files(root_dir)
+            if entry.name.lower().endswith(VIDEO_EXTENSIONS)]
+
+
+def iter_video_files_parallel(input_dirs, max_workers=None):
+    """按顶层子目录拆分，用线程池并行查找视频文件，按完成顺序逐个产出"""
+    if max_workers is None:
+        max_workers = min(32, usable_cpu_count() * 4)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for input_dir in input_dirs:
+            try:
+                with os.scandir(input_dir) as it:
+                    entries = list(it)
+            except OSError as e:
+                print(f"Error scanning {input_dir}: {e}")
+                continue
+
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        futures.append(executor.submit(find_video_files, entry.path))
+                elif entry.is_file() and entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                    yield entry.path
+
+        for future in as_completed(futures):
+            yield from future.result()
 
 
 def get_video_name(video_path):
@@ -31,87 +120,119 @@ def get_video_name(video_path):
     filename = os.path.basename(video_path)
     name, _ = os.path.splitext(filename)
 
-    # 清理文件名中的非法字符
-    invalid_chars = {'\\', '/', ':', '*', '?', '"', '<', '>', '|'}
-    clean_name = ''.join(c for c in name if c not in invalid_chars)
+    # 清理文件名中的非法字符并限制文件名长度
+    return _INVALID_RE.sub('', name)[:150]
 
-    # 限制文件名长度
-    if len(clean_name) > 150:
-        clean_name = clean_name[:150]
 
-    return clean_name
+def _already_converted(mp3_path):
+    """只用一次stat判断输出文件是否已存在且非空"""
+    try:
+        return os.stat(mp3_path).st_size > 0
+    except FileNotFoundError:
+        return False
 
 
-def process_single_file(video_path, output_dir, progress_callback=None):
-    """处理单个视频文件（带进度回调）"""
+def _encode_args(final_mp3, ffmpeg_threads):
+    """单个MP3输出的编码参数"""
+    # 由调用方决定ffmpeg内部线程数，避免与并发任务叠加导致CPU超额订阅
+    threads_args = (_ARG_THREADS, _native_arg(str(ffmpeg_threads))) if ffmpeg_threads is not None else ()
+    return [*threads_args, *_FFMPEG_ENC, _native_arg(final_mp3)]
+
+
+def prepare_single_file(video_path, output_dir):
+    """确定视频文件对应的MP3路径（不启动ffmpeg）
+
+    返回需要转换的MP3路径；输出已存在时返回True，无法处理时返回False
+    """
+    print(f"Processing: {video_path}")
+    video_name = get_video_name(video_path)
+    if not video_name:
+        print(f"Invalid video name for: {video_path}")
+        return False
+
+    final_mp3 = os.path.join(output_dir, f'{video_name}.mp3')
+
+    if _already_converted(final_mp3):
+        print(f"Skipping existing file: {final_mp3}")
+        return True
+
+    return final_mp3
+
+
+async def _convert_single(video_path, final_mp3, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用把单个视频的音频转换为MP3"""
+    # 一次ffmpeg调用完成音频分离和MP3编码，不再经过临时AAC文件
+    print(f"Converting to MP3: {video_path}")
+    args = [
+        _ARG_INPUT, _native_arg(video_path),
+        _ARG_MAP, _MAP_FIRST_AUDIO,
+        *_encode_args(final_mp3, ffmpeg_threads),
+    ]
     try:
-        print(f"Processing: {video_path}")
-        video_name = get_video_name(video_path)
-        if not video_name:
-            print(f"Invalid video name for: {video_path}")
-            if progress_callback:
-                progress_callback(False)
-            return False
+        returncode, stderr = await run_ffmpeg(args)
+    except Exception as e:
+        # 进程无法启动（如OSError）时同样只报告一次结果
+        print(f"Unexpected error processing {video_path}: {str(e)}")
+        if progress_callback:
+            progress_callback(False)
+        return False
 
-        os.makedirs(output_dir, exist_ok=True)
-        final_mp3 = os.path.join(output_dir, f'{video_name}.mp3')
+    if returncode != 0:
+        print(f"Error processing {video_path}: MP3 conversion failed: {stderr}")
+        if progress_callback:
+            progress_callback(False)
+        return False
 
-        if os.path.exists(final_mp3) and os.path.getsize(final_mp3) > 0:
-            print(f"Skipping existing file: {final_mp3}")
-            if progress_callback:
-                progress_callback(True)
-            return True
+    print(f"Successfully converted: {video_path} -> {final_mp3}")
+    if progress_callback:
+        progress_callback(True)
+    return True
 
-        temp_aac = os.path.splitext(final_mp3)[0] + "_temp.aac"
 
-        try:
-            print(f"Extracting audio for: {video_path}")
-            extract_result = subprocess.run([
-                'ffmpeg',
-                '-hide_banner',
-                '-loglevel', 'error',
-                '-i', video_path,
-                '-c:a', 'copy',
-                '-vn',
-                '-y',
-                temp_aac
-            ], capture_output=True, text=True)
-
-            if extract_result.returncode != 0:
-                raise RuntimeError(f"AAC extraction failed: {extract_result.stderr}")
-
-            print(f"Converting to MP3: {video_path}")
-            convert_result = subprocess.run([
-                'ffmpeg',
-                '-hide_banner',
-                '-loglevel', 'error',
-                '-i', temp_aac,
-                '-c:a', 'libmp3lame',
-                '-q:a', '0',
-                '-y',
-                final_mp3
-            ], capture_output=True, text=True)
-
-            if convert_result.returncode != 0:
-                raise RuntimeError(f"MP3 conversion failed: {convert_result.stderr}")
+async def _convert_batch(jobs, results, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用转换多个视频文件，整批失败时逐个重试；每个文件的结果追加到results"""
+    if len(jobs) == 1:
+        results.append(await _convert_single(*jobs[0], progress_callback, ffmpeg_threads))
+        return
+
+    args = []
+    for video_path, _ in jobs:
+        args += [_ARG_INPUT, _native_arg(video_path)]
+    for index, (_, final_mp3) in enumerate(jobs):
+        args += [_ARG_MAP, _native_arg(f'{index}:a:0'), *_encode_args(final_mp3, ffmpeg_threads)]
+
+    print(f"Converting {len(jobs)} files to MP3 in one batch")
+    try:
+        returncode, stderr = await run_ffmpeg(args)
+    except Exception as e:
+        # 进程无法启动时按整批失败处理，交给下面的逐个重试
+        returncode, stderr = None, str(e)
 
+    if returncode == 0:
+        for video_path, final_mp3 in jobs:
             print(f"Successfully converted: {video_path} -> {final_mp3}")
             if progress_callback:
                 progress_callback(True)
-            return True
+            results.append(True)
+        return
 
-        except Exception as e:
-            print(f"Error processing {video_path}: {str(e)}")
+    print(f"FFmpeg batch of {len(jobs)} files failed, retrying one by one:\n{stderr}")
+    for job in jobs:
+        results.append(await _convert_single(*job, progress_callback, ffmpeg_threads))
+
+
+async def process_single_file(video_path, output_dir, progress_callback=None, ffmpeg_threads=None):
+    """处理单个视频文件（带进度回调）"""
+    try:
+        # 文件读取和目录扫描都是阻塞I/O，放到线程中执行，避免阻塞事件循环
+        loop = asyncio.get_running_loop()
+        final_mp3 = await loop.run_in_executor(None, prepare_single_file, video_path, output_dir)
+        if isinstance(final_mp3, bool):
             if progress_callback:
-                progress_callback(False)
-            return False
+                progress_callback(final_mp3)
+            return final_mp3
 
-        finally:
-            if os.path.exists(temp_aac):
-                try:
-                    os.remove(temp_aac)
-                except Exception as e:
-                    print(f"Failed to remove temp file {temp_aac}: {str(e)}")
+        return await _convert_single(video_path, final_mp3, progress_callback, ffmpeg_threads)
 
     except Exception as e:
         print(f"Unexpected error processing {video_path}: {str(e)}")
@@ -120,53 +241,179 @@ def process_single_file(video_path, output_dir, progress_callback=None):
         return False
 
 
-def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max_workers=None):
-    """并行处理多个输入文件夹"""
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+async def process_batch(video_paths, output_dir, results, progress_callback=None, ffmpeg_threads=None):
+    """用一次ffmpeg调用转换多个视频文件，分摊进程启动和编码器初始化开销
 
-    # 收集所有视频文件
-    all_video_files = []
-    for input_dir in input_dirs:
-        all_video_files.extend(find_video_files(input_dir))
+    整批失败时逐个重试，以确定每个文件各自的结果。每个文件得出结果时立即追加到results，
+    即使中途发生异常，调用方也能据此知道哪些文件已经报告过结果
+    """
+    if len(video_paths) == 1:
+        results.append(await process_single_file(video_paths[0], output_dir, progress_callback, ffmpeg_threads))
+        return
 
-    total = len(all_video_files)
-    if total == 0:
-        print("没有找到任何视频文件")
-        return 0, 0
+    jobs = []
+    singles = []
+    deferred = []
+    outputs = set()
+    # 在线程中并行准备本批所有文件，阻塞I/O不占用事件循环线程
+    loop = asyncio.get_running_loop()
+    prepared = await asyncio.gather(
+        *(loop.run_in_executor(None, prepare_single_file, video_path, output_dir) for video_path in video_paths),
+        return_exceptions=True
+    )
+    for video_path, final_mp3 in zip(video_paths, prepared):
+        if isinstance(final_mp3, Exception):
+            print(f"Unexpected error processing {video_path}: {str(final_mp3)}")
+            final_mp3 = False
+
+        if isinstance(final_mp3, bool):
+            if progress_callback:
+                progress_callback(final_mp3)
+            results.append(final_mp3)
+        elif final_mp3 in outputs:
+            # 同一批内输出文件重名，等本批完成后再处理
+            deferred.append(video_path)
+        else:
+            outputs.add(final_mp3)
+            if video_path.lower().endswith(UNBATCHED_EXTENSIONS):
+                singles.append((video_path, final_mp3))
+            else:
+                jobs.append((video_path, final_mp3))
+
+    async def convert_single(job):
+        results.append(await _convert_single(*job, progress_callback, ffmpeg_threads))
+
+    # 逐个转换的文件与整批同时运行，本批占用的并发名额都能用上
+    conversions = [convert_single(job) for job in singles]
+    if jobs:
+        conversions.append(_convert_batch(jobs, results, progress_callback, ffmpeg_threads))
+    # 等全部转换结束后再抛出异常，避免仍在运行的任务在调用方统计之后才追加结果
+    for outcome in await asyncio.gather(*conversions, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            raise outcome
+
+    for video_path in deferred:
+        results.append(await process_single_file(video_path, output_dir, progress_callback, ffmpeg_threads))
+
+
+# 查找结果队列的容量，查找过快时生产者在此等待
+DISCOVERY_QUEUE_SIZE = 256
+# 单次ffmpeg调用最多合并转换的文件数
+FFMPEG_BATCH_SIZE = 32
+
+
+async def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max_workers=None,
+                                   discovered_callback=None):
+    """并行处理多个输入文件夹（discovered_callback在每找到一个文件时调用，查找结束时以None调用）"""
+    # 输出目录只在开始时创建一次，单个文件处理时不再重复检查
+    os.makedirs(output_dir, exist_ok=True)
 
     # 如果没有指定最大工作线程数，则自动设置
     if max_workers is None:
-        logical_cores = psutil.cpu_count(logical=True)
+        logical_cores = usable_cpu_count()
         max_workers = max(1, logical_cores - 1)  # 确保至少1个线程
 
-    # 使用线程池并行处理
-    success = 0
-    processed = 0
-    lock = threading.Lock()  # 用于线程安全的计数
-
-    def task_wrapper(video_path):
-        nonlocal success, processed
-        result = process_single_file(video_path, output_dir,
-                                    lambda success_flag: progress_callback(success_flag) if progress_callback else None)
-        with lock:
-            processed += 1
-            if result:
-                success += 1
-            # 更新进度
-            if progress_callback:
-                progress_callback(None)  # 触发进度更新
-        return result
+    # 先取出max_workers个文件，文件较少时据此缩小并发数
+    discovered = iter_video_files_parallel(input_dirs)
+    loop = asyncio.get_running_loop()
+    head = await loop.run_in_executor(None, list, itertools.islice(discovered, max_workers))
+    if discovered_callback:
+        for path in head:
+            discovered_callback(path)
+    if not head:
+        if discovered_callback:
+            discovered_callback(None)
+        print("没有找到任何视频文件")
+        return 0, 0
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(task_wrapper, video_path) for video_path in all_video_files]
+    # 音频解码和libmp3lame编码都是单线程的，-threads 0不会带来额外并行，始终让编解码器单线程运行。
+    # -threads只限制编解码器内部的线程：FFmpeg 7起一次多输入调用中每个解码器和编码器各占一个线程，
+    # 因此下面把一批按len(batch)个名额计入max_workers，而不是按一个任务计
+    ffmpeg_threads = 1
+    # 文件少于并发数时不必启动多余的消费者
+    max_workers = min(max_workers, len(head))
 
-        # 等待所有任务完成
-        for future in as_completed(futures):
+    # 生产者/消费者流水线：查找线程把路径放入有界队列，固定数量的转换协程从队列取任务
+    queue = asyncio.Queue(maxsize=DISCOVERY_QUEUE_SIZE)
+    pending = collections.deque(head)
+
+    def produce():
+        try:
+            for path in discovered:
+                if discovered_callback:
+                    discovered_callback(path)
+                asyncio.run_coroutine_threadsafe(queue.put(path), loop).result()
+        finally:
+            if discovered_callback:
+                discovered_callback(None)
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()  # 结束标记
+
+    async def next_path():
+        if pending:
+            return pending.popleft()
+        path = await queue.get()
+        if path is None:
+            queue.put_nowait(None)  # 放回结束标记，让其他消费者也能退出
+        return path
+
+    async def next_batch():
+        """取出一批路径：积压越多每批合并越多，积压不足时逐个处理以保持并行"""
+        first = await next_path()
+        if first is None:
+            return []
+
+        batch = [first]
+        backlog = len(pending) + queue.qsize()
+        # 一批最多占满全部并发名额
+        batch_size = max(1, min(FFMPEG_BATCH_SIZE, max_workers, backlog // max_workers))
+        while len(batch) < batch_size:
+            if pending:
+                batch.append(pending.popleft())
+            elif not queue.empty():
+                path = queue.get_nowait()
+                if path is None:
+                    queue.put_nowait(None)
+                    break
+                batch.append(path)
+            else:
+                break
+        return batch
+
+    # 同时转换的文件数不超过max_workers：每批按文件数占用名额，整批获取以免多个消费者各持一部分而互相等待
+    slots = asyncio.Semaphore(max_workers)
+    slots_lock = asyncio.Lock()
+
+    total = 0
+    success = 0
+
+    async def consumer():
+        nonlocal total, success
+        while batch := await next_batch():
+            async with slots_lock:
+                for _ in batch:
+                    await slots.acquire()
+            results = []
             try:
-                future.result()  # 捕获任何异常
+                await process_batch(batch, output_dir, results, progress_callback, ffmpeg_threads)
             except Exception as e:
                 print(f"处理过程中发生异常: {str(e)}")
+            finally:
+                for _ in batch:
+                    slots.release()
+            # 只把还没有结果的文件记为失败，并为它们补发进度回调，已报告的结果保持不变
+            missing = len(batch) - len(results)
+            if missing > 0:
+                if progress_callback:
+                    for _ in range(missing):
+                        progress_callback(False)
+                results += [False] * missing
+            # 计数只在事件循环线程中修改，普通整数累加即可，无需加锁或原子计数器
+            total += len(results)
+            success += sum(results)
+
+    producer = loop.run_in_executor(None, produce)
+    await asyncio.gather(*(consumer() for _ in range(max_workers)))
+    await producer
 
     return total, success
 
@@ -174,29 +421,30 @@ def process_folders_parallel(input_dirs, output_dir, progress_callback=None, max
 class ProgressWindow:
     """进度显示窗口"""
 
-    def __init__(self, total_tasks):
-        self.root = tk.Tk()
-        self.root.title("处理进度")
-        self.root.geometry("400x200")
-        self.root.resizable(False, False)
-
-        # 防止重复创建Tk实例
-        if hasattr(ProgressWindow, 'instance_created'):
-            self.root.destroy()
-            return
-        ProgressWindow.instance_created = True
-
-        self.total = total_tasks
+    def __init__(self, root):
+        # 复用程序唯一的Tk根窗口，进度窗口作为其子窗口
+        self.root = root
+        self.window = tk.Toplevel(root)
+        self.window.title("处理进度")
+        self.window.geometry("400x200")
+        self.window.resizable(False, False)
+
+        # 总数随查找进度增长：_discovered只由查找一侧修改（同一时刻只有一个线程），Tk线程只读
+        self.total = 0
+        self._discovered = 0
+        self._discovery_done = False
         self.completed = 0
         self.success = 0
+        # 工作线程只往队列追加结果，由Tk线程定时统一刷新界面
+        self._results = collections.deque()
         self.start_time = time.time()
         self.running = True
 
         # 创建框架容器
-        frame = ttk.Frame(self.root, padding="10")
+        frame = ttk.Frame(self.window, padding="10")
         frame.pack(fill=tk.BOTH, expand=True)
 
-        self.label = ttk.Label(frame, text=f"准备处理 {total_tasks} 个文件...", font=("Arial", 10))
+        self.label = ttk.Label(frame, text="正在查找文件...", font=("Arial", 10))
         self.label.pack(pady=5)
 
         self.progress = ttk.Progressbar(frame, orient="horizontal", length=380, mode="determinate")
@@ -236,41 +484,62 @@ class ProgressWindow:
         self.cancel_button = ttk.Button(button_frame, text="取消", command=self.cancel)
         self.cancel_button.pack(side=tk.RIGHT)
 
-        self.root.protocol("WM_DELETE_WINDOW", self.cancel)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
         self.root.after(100, self.update_time)
 
     def update(self, success_flag=None):
+        """记录一个任务结果（可在任意线程调用，不访问Tk）"""
+        if success_flag is not None:
+            self._results.append(bool(success_flag))
+
+    def add_task(self, path):
+        """记录一个新找到的文件；path为None表示查找结束（不访问Tk）"""
+        if path is None:
+            self._discovery_done = True
+        else:
+            self._discovered += 1
+
+    def update_time(self):
+        """Tk线程定时器：合并期间完成和新找到的任务，每个周期最多重绘一次"""
         if not self.running:
             return
 
-        if success_flag is not None:
-            if success_flag:
+        finished = 0
+        while self._results:
+            finished += 1
+            if self._results.popleft():
                 self.success += 1
-            self.completed += 1
+        self.completed += finished
 
-        progress_value = min(100, int((self.completed / self.total) * 100))
-        self.progress["value"] = progress_value
+        # 先读结束标记再读总数：标记为True时读到的总数一定是最终值
+        discovery_done = self._discovery_done
+        discovered = self._discovered
+        total_changed = discovered != self.total
+        self.total = discovered
 
         elapsed = time.time() - self.start_time
-        speed = self.completed / elapsed if elapsed > 0 else 0
+        self.time_label["text"] = f"已用时间: {elapsed:.1f}秒"
 
-        self.label["text"] = f"处理中: {self.completed}/{self.total} ({progress_value}%)"
-        self.status["text"] = "状态: 处理中..." if self.completed < self.total else "状态: 完成!"
-        self.success_label["text"] = f"成功: {self.success}"
-        self.failed_label["text"] = f"失败: {self.completed - self.success}"
-        self.remaining_label["text"] = f"剩余: {self.total - self.completed}"
-        self.speed_label["text"] = f"速度: {speed:.2f} 文件/秒"
+        if (finished or total_changed) and self.total:
+            progress_value = min(100, int((self.completed / self.total) * 100))
+            self.progress["value"] = progress_value
 
-        if self.completed >= self.total:
+            speed = self.completed / elapsed if elapsed > 0 else 0
+
+            self.label["text"] = f"处理中: {self.completed}/{self.total} ({progress_value}%)"
+            self.status["text"] = "状态: 处理中..." if not discovery_done or self.completed < self.total else "状态: 完成!"
+            self.success_label["text"] = f"成功: {self.success}"
+            self.failed_label["text"] = f"失败: {self.completed - self.success}"
+            self.remaining_label["text"] = f"剩余: {self.total - self.completed}"
+            self.speed_label["text"] = f"速度: {speed:.2f} 文件/秒"
+
+        if discovery_done and self.completed >= self.total:
             self.cancel_button["text"] = "关闭"
             self.status["text"] = "状态: 处理完成!"
             self.running = False
+            return
 
-    def update_time(self):
-        if self.running:
-            elapsed = time.time() - self.start_time
-            self.time_label["text"] = f"已用时间: {elapsed:.1f}秒"
-            self.root.after(1000, self.update_time)
+        self.root.after(100, self.update_time)  # 最多约10次/秒
 
     def cancel(self):
         self.running = False
@@ -278,18 +547,14 @@ class ProgressWindow:
 
     def close(self):
         self.running = False
-        self.root.destroy()
+        self.window.destroy()
 
 
-def select_folders():
+def select_folders(root):
     """使用GUI选择多个文件夹（优化版）"""
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
-
     print("请选择要处理的文件夹...")
     # 允许选择多个文件夹
-    folders = filedialog.askdirectory(title="选择要处理的文件夹", mustexist=True)
+    folders = filedialog.askdirectory(parent=root, title="选择要处理的文件夹", mustexist=True)
 
     if not folders:
         print("没有选择文件夹")
@@ -299,14 +564,10 @@ def select_folders():
     return [folders] if isinstance(folders, str) else list(folders)
 
 
-def select_output_dir():
+def select_output_dir(root):
     """使用GUI选择输出目录"""
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes("-topmost", True)
-
     print("请选择输出目录...")
-    output_dir = filedialog.askdirectory(title="选择输出目录", mustexist=False)
+    output_dir = filedialog.askdirectory(parent=root, title="选择输出目录", mustexist=False)
 
     if not output_dir:
         print("没有选择输出目录")
@@ -318,55 +579,61 @@ def select_output_dir():
 def main():
     print("=== 一键.mp4To.mp3脚本 ===")
 
+    # 整个程序只创建一个Tk根窗口，所有对话框和进度窗口复用它
+    root = tk.Tk()
+    root.withdraw()
+    root.attributes("-topmost", True)
+
     # 检查ffmpeg是否可用
     try:
-        subprocess.run(['ffmpeg', '-version'], check=True,
+        subprocess.run([FFMPEG_PATH, '-version'], check=True,
                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         print("FFmpeg 可用")
     except Exception as e:
         print("错误: 没有找到ffmpeg或无法执行。请确保ffmpeg已安装并添加到系统PATH中。")
-        messagebox.showerror("错误", "没有找到FFmpeg! 请确保FFmpeg已安装并添加到系统PATH中。")
+        messagebox.showerror("错误", "没有找到FFmpeg! 请确保FFmpeg已安装并添加到系统PATH中。", parent=root)
         return
 
     # 选择输入文件夹
-    input_dirs = select_folders()
+    input_dirs = select_folders(root)
     if not input_dirs:
         return
 
     # 选择输出目录
-    output_dir = select_output_dir()
+    output_dir = select_output_dir(root)
     if not output_dir:
         return
 
-    # 显示进度窗口
-    total_files = sum(len(find_video_files(d)) for d in input_dirs)
-    if total_files == 0:
-        messagebox.showinfo("提示", "没有找到任何视频文件")
-        return
-
-    progress_window = ProgressWindow(total_files)
+    # 显示进度窗口，文件总数在查找过程中逐步更新
+    progress_window = ProgressWindow(root)
 
     # 启动处理线程
     def processing_thread():
         # 根据系统调整并行度
         max_workers = None
         if platform.system() == "Windows":
-            max_workers = psutil.cpu_count(logical=True) - 1  # Windows上限制并发数
+            max_workers = max(1, usable_cpu_count() - 1)  # Windows上限制并发数
 
-        total, success = process_folders_parallel(
+        total, success = asyncio.run(process_folders_parallel(
             input_dirs,
             output_dir,
-            lambda _: progress_window.update(),  # 使用lambda确保回调能触发
-            max_workers
-        )
+            progress_window.update,
+            max_workers,
+            progress_window.add_task
+        ))
 
         # 处理完成后关闭窗口
         progress_window.close()
 
+        if total == 0:
+            messagebox.showinfo("提示", "没有找到任何视频文件", parent=root)
+            root.quit()
+            return
+
         # 显示完成消息
         message = f"处理完成!\n共处理 {total} 个文件, 成功 {success} 个"
         print(message)
-        messagebox.showinfo("完成", message)
+        messagebox.showinfo("完成", message, parent=root)
 
         # 打开输出文件夹
         if os.name == 'nt':  # Windows
@@ -375,12 +642,15 @@ def main():
             opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
             subprocess.run([opener, output_dir], check=False)
 
+        # 结束主事件循环
+        root.quit()
+
     # 启动处理线程
     thread = threading.Thread(target=processing_thread, daemon=True)
     thread.start()
 
     # 启动主事件循环
-    progress_window.root.mainloop()
+    root.mainloop()
 
     # 等待处理线程完成
     thread.join()